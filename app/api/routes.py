@@ -1,18 +1,28 @@
 """API route handlers."""
+import asyncio
+import functools
+import hashlib
 import logging
-import traceback
+import threading
+import time
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body
-from fastapi.responses import JSONResponse
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Header, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel
+from qdrant_client.models import Filter, FieldCondition, MatchValue
 import json
 
-from app.db.database import get_db
+from app.db.database import get_db, SessionLocal
 from app.db.models import Document
+from app.ingest.batcher import EmbeddingBatcher
 from app.ingest.processor import DocumentProcessor
 from app.vectorstore.qdrant_client import QdrantStore
 from app.config import settings
@@ -20,26 +30,236 @@ from app.config import settings
 # Set up logger for this module
 logger = logging.getLogger("app.api")
 
-router = APIRouter()
+# orjson renders responses 2-5x faster than stdlib json; chunk-text-heavy
+# search responses benefit the most
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# Initialize processor and vectorstore lazily to avoid issues at import time
+# Initialize processor and vectorstore lazily to avoid issues at import time.
+# Init is double-checked under a lock: constructing DocumentProcessor loads
+# the embedding model, and two threads racing the None check would load it
+# twice. Startup pre-warms these so requests never pay the load.
 _processor = None
 _vectorstore = None
+_batcher = None
+_init_lock = threading.Lock()
 
 def get_processor():
-    """Get or create document processor."""
+    """Get or create document processor (thread-safe)."""
     global _processor
     if _processor is None:
-        _processor = DocumentProcessor()
+        with _init_lock:
+            if _processor is None:
+                _processor = DocumentProcessor()
     return _processor
 
 def get_vectorstore():
-    """Get or create vector store."""
+    """Get or create vector store (thread-safe)."""
     global _vectorstore
     if _vectorstore is None:
-        _vectorstore = QdrantStore()
+        with _init_lock:
+            if _vectorstore is None:
+                _vectorstore = QdrantStore()
     return _vectorstore
 
+def get_batcher():
+    """Get or create the query embedding batcher (thread-safe)."""
+    global _batcher
+    if _batcher is None:
+        processor = get_processor()
+        with _init_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher(
+                    lambda texts: processor.embedding_model.encode(
+                        texts,
+                        batch_size=len(texts),
+                        show_progress_bar=False,
+                        convert_to_numpy=True
+                    )
+                )
+    return _batcher
+
+
+def warmup():
+    """
+    Eagerly initialize the processor and vector store at startup.
+
+    A throwaway encode triggers tokenizer/kernel warm paths so the first real
+    request doesn't pay model-load plus cold-inference latency.
+    """
+    processor = get_processor()
+    processor.embedding_model.encode(["warmup"], show_progress_bar=False)
+    get_vectorstore()
+
+
+def shutdown():
+    """Close the shared vector store connection, if it was created."""
+    if _vectorstore is not None:
+        _vectorstore.close()
+
+
+# Bound the number of concurrent background Qdrant uploads
+_ingest_sem = asyncio.Semaphore(settings.qdrant_concurrency)
+
+# Strong references to in-flight background upload tasks. The event loop
+# only holds weak references to tasks, so without this an upload task can
+# be garbage-collected mid-flight, silently dropping its vectors.
+_bg_tasks = set()
+
+
+def _spawn_bg_task(coro) -> asyncio.Task:
+    """Schedule a background coroutine, keeping it referenced until done."""
+    task = asyncio.create_task(coro)
+    _bg_tasks.add(task)
+    task.add_done_callback(_bg_tasks.discard)
+    return task
+
+
+# Namespace for deterministic chunk point IDs
+_CHUNK_NS = uuid.UUID("8f4f64a5-2f0e-4b4e-9c16-3df273a0e0c1")
+
+
+def _chunk_point_ids(doc_id: str, n: int) -> List[str]:
+    """
+    Deterministic UUIDv5 point IDs for a document's chunks.
+
+    Derived from (doc_id, chunk_index), so reindexing the same document
+    upserts over the same points instead of minting fresh random IDs —
+    no urandom syscalls, and Qdrant still gets valid UUIDs.
+    """
+    return [str(uuid.uuid5(_CHUNK_NS, f"{doc_id}:{i}")) for i in range(n)]
+
+
+def _set_document_status(doc_id: str, status: str):
+    """Update a document's status from a background task (own session)."""
+    db = SessionLocal()
+    try:
+        doc = db.query(Document).filter(Document.id == doc_id).first()
+        if doc:
+            doc.status = status
+            db.commit()
+    except Exception as e:
+        logger.error("Failed to update status for document %s: %s", doc_id, e, exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def _upload_vectors_bg(doc_id: str, vectors, payloads, ids):
+    """Upload vectors to Qdrant in batches off the request path."""
+    vectorstore = get_vectorstore()
+    batch_size = settings.qdrant_upsert_batch_size
+    try:
+        async with _ingest_sem:
+            # Intermediate batches use wait=False so the server pipelines
+            # them; the final batch waits, acting as the flush that gates
+            # the status flip to "indexed"
+            last_start = ((len(vectors) - 1) // batch_size) * batch_size
+            for i in range(0, len(vectors), batch_size):
+                await asyncio.to_thread(
+                    vectorstore.add_vectors,
+                    vectors[i:i + batch_size],
+                    payloads[i:i + batch_size],
+                    ids[i:i + batch_size],
+                    i == last_start
+                )
+        await asyncio.to_thread(_set_document_status, doc_id, "indexed")
+        logger.info("Background indexing complete for document: %s (%s vectors)", doc_id, len(vectors))
+    except Exception as e:
+        logger.error("Background indexing failed for document %s: %s", doc_id, e, exc_info=True)
+        await asyncio.to_thread(_set_document_status, doc_id, "failed")
+
+
+# Bounded LRU of query embeddings keyed by normalized query text. Repeated
+# queries skip the transformer forward pass entirely; entries are float32
+# numpy arrays to avoid re-boxing into Python lists on every hit.
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+# In-flight deduplication: concurrent cache misses for the same query share
+# one encode instead of each taking a slot in the batch. Keyed by the same
+# normalized-query hash as the LRU; only touched from the event loop.
+_inflight = {}
+
+
+def _query_cache_key(query: str) -> bytes:
+    """Cache key for a search query: hash of the normalized text."""
+    return hashlib.blake2b(
+        query.strip().lower().encode("utf-8"), digest_size=16
+    ).digest()
+
+
+async def get_query_embedding(query: str):
+    """Encode a search query, reusing a cached embedding when available."""
+    key = _query_cache_key(query)
+    with _query_cache_lock:
+        cached = _query_cache.get(key)
+        if cached is not None:
+            _query_cache.move_to_end(key)
+            return cached
+
+    # Identical query already being encoded: await its result rather than
+    # submitting a duplicate to the batcher
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    # Miss: go through the batcher so concurrent queries share one model call
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        embedding = await get_batcher().submit(query)
+        future.set_result(embedding)
+    except Exception as e:
+        future.set_exception(e)
+        # Keep the loop from logging "exception never retrieved" when no
+        # duplicate request was waiting on the future
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    with _query_cache_lock:
+        _query_cache[key] = embedding
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > settings.query_cache_size:
+            _query_cache.popitem(last=False)
+    return embedding
+
+
+# Upload hashing reads the spooled body in 1 MiB chunks
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+async def hash_spooled_upload(file: UploadFile):
+    """
+    Hash an upload in place over the file Starlette already spooled.
+
+    By the time the handler runs, the multipart parser has streamed the
+    part into file.file (a spooled temp file), so hashing that object
+    directly avoids copying the body into a second spool and doubling the
+    disk I/O.
+
+    Returns:
+        Tuple of (spooled file object, sha256 hex digest, total bytes read).
+    """
+    def _hash(fileobj):
+        h = hashlib.sha256()
+        total = 0
+        fileobj.seek(0)
+        while chunk := fileobj.read(UPLOAD_CHUNK_SIZE):
+            h.update(chunk)
+            total += len(chunk)
+        fileobj.seek(0)
+        return h.hexdigest(), total
+
+    sha256, total = await asyncio.to_thread(_hash, file.file)
+    # Catches chunked uploads that bypass the Content-Length middleware;
+    # the body has already been spooled by Starlette at this point, so the
+    # best we can do is refuse to process it
+    if total > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail="File too large")
+    return file.file, sha256, total
+
 
 class SearchRequest(BaseModel):
     """Search request model."""
@@ -48,37 +268,84 @@ class SearchRequest(BaseModel):
     filters: Optional[dict] = None
 
 
+class BatchSearchRequest(BaseModel):
+    """Batch search request model."""
+    queries: List[str]
+    top_k: int = 5
+    filters: Optional[dict] = None
+
+
+class SearchResult(BaseModel):
+    """A single search hit."""
+    score: float
+    document_id: Optional[str] = None
+    document_name: Optional[str] = None
+    chunk_index: Optional[int] = None
+    chunk_text: str = ""
+    token_count: int = 0
+    metadata: dict = {}
+
+
+class SearchResponse(BaseModel):
+    """Response model for /search; serialized by pydantic-core."""
+    query: str
+    results: List[SearchResult]
+    total_results: int
+
+
+# Probes (k8s, load balancers, scrapers) can hit /health many times a
+# second; cache the result briefly and collapse concurrent refreshes so each
+# TTL window costs at most one SQLite + one Qdrant round trip.
+_health_cache = {"ts": 0.0, "value": None}
+_health_lock = asyncio.Lock()
+
+
 @router.get("/health")
 async def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint."""
-    logger.info("Health check requested")
-    
-    # Check SQLite
-    sqlite_ok = False
-    try:
-        db.execute(text("SELECT 1"))
-        sqlite_ok = True
-        logger.debug("SQLite health check: OK")
-    except Exception as e:
-        logger.error(f"SQLite health check failed: {e}", exc_info=True)
-    
-    # Check Qdrant
-    qdrant_ok = False
-    try:
-        qdrant_ok = get_vectorstore().health_check()
-        logger.debug(f"Qdrant health check: {'OK' if qdrant_ok else 'FAILED'}")
-    except Exception as e:
-        logger.error(f"Qdrant health check failed: {e}", exc_info=True)
-    
-    status = {
-        "status": "ok",
-        "sqlite": "ok" if sqlite_ok else "error",
-        "qdrant": "ok" if qdrant_ok else "error",
-        "embedding_model": settings.embedding_model
-    }
-    
-    logger.info(f"Health check result: {status}")
-    return status
+    """Health check endpoint (cached with a short TTL)."""
+    now = time.monotonic()
+    cached = _health_cache["value"]
+    if cached is not None and now - _health_cache["ts"] < settings.health_ttl_s:
+        return cached
+
+    async with _health_lock:
+        # Re-check after acquiring: another coroutine may have refreshed
+        now = time.monotonic()
+        cached = _health_cache["value"]
+        if cached is not None and now - _health_cache["ts"] < settings.health_ttl_s:
+            return cached
+
+        logger.info("Health check requested")
+
+        # Check SQLite
+        sqlite_ok = False
+        try:
+            db.execute(text("SELECT 1"))
+            sqlite_ok = True
+            logger.debug("SQLite health check: OK")
+        except Exception as e:
+            logger.error("SQLite health check failed: %s", e, exc_info=True)
+
+        # Check Qdrant
+        qdrant_ok = False
+        try:
+            qdrant_ok = await asyncio.to_thread(get_vectorstore().health_check)
+            logger.debug("Qdrant health check: %s", 'OK' if qdrant_ok else 'FAILED')
+        except Exception as e:
+            logger.error("Qdrant health check failed: %s", e, exc_info=True)
+
+        status = {
+            "status": "ok",
+            "sqlite": "ok" if sqlite_ok else "error",
+            "qdrant": "ok" if qdrant_ok else "error",
+            "embedding_model": settings.embedding_model
+        }
+
+        _health_cache["value"] = status
+        _health_cache["ts"] = time.monotonic()
+
+        logger.info("Health check result: %s", status)
+        return status
 
 
 @router.post("/documents")
@@ -86,267 +353,521 @@ async def upload_document(
     file: UploadFile = File(...),
     metadata_json: Optional[str] = Form(None),
     force_reindex: bool = Form(False),
+    content_sha256: Optional[str] = Header(None, alias="X-Content-SHA256"),
     db: Session = Depends(get_db)
 ):
-    """Upload and process a document."""
+    """Upload and process a document.
+
+    The Content-Length fast fail lives in middleware (see app.main), which
+    runs before the multipart body is parsed; chunked uploads without
+    Content-Length are bounded inside the streaming read below.
+    """
     filename = file.filename or "unknown"
-    logger.info(f"Document upload requested: {filename} (size: {file.size if hasattr(file, 'size') else 'unknown'}, force_reindex: {force_reindex})")
-    
+    logger.info("Document upload requested: %s (size: %s, force_reindex: %s)", filename, file.size if hasattr(file, 'size') else 'unknown', force_reindex)
+
     try:
-        # Read file content
-        content = await file.read()
-        content_size = len(content)
-        logger.debug(f"Read {content_size} bytes from {filename}")
+        # If the client pre-declared the content hash, try the dedup lookup
+        # before touching the body: a duplicate upload then costs one indexed
+        # SQLite probe instead of a full read + hash. Rows whose background
+        # indexing failed fall through so a plain retry re-ingests them
+        # instead of dead-ending on "already exists".
+        if content_sha256 and not force_reindex:
+            existing_row = db.query(
+                Document.id, Document.chunk_count, Document.total_tokens,
+                Document.status
+            ).filter(Document.sha256 == content_sha256).first()
+            if existing_row and existing_row.status != "failed":
+                logger.info("Document already exists (header dedup): %s (doc_id: %s)", filename, existing_row.id)
+                return {
+                    "message": "Document already exists",
+                    "document_id": existing_row.id,
+                    "chunk_count": existing_row.chunk_count,
+                    "total_tokens": existing_row.total_tokens,
+                    "status": existing_row.status
+                }
+
+        # Hash the already-spooled upload without buffering it in memory or
+        # copying it to a second temp file
+        spool, sha256, content_size = await hash_spooled_upload(file)
+        logger.debug("Read %s bytes from %s", content_size, filename)
+        logger.debug("Document SHA256: %s", sha256)
+
+        # Keep the byte-exactness guarantee: a client-declared hash that does
+        # not match the streamed bytes is a hard error, not a silent dedup miss
+        if content_sha256 and content_sha256.lower() != sha256:
+            spool.close()
+            logger.warning("X-Content-SHA256 mismatch for %s: declared %s, computed %s", filename, content_sha256, sha256)
+            raise HTTPException(status_code=400, detail="X-Content-SHA256 does not match uploaded content")
+
+        if not force_reindex:
+            # Dedup only needs a few columns; a lean Core select hits the
+            # unique sha256 index without hydrating an ORM instance
+            existing_doc = None
+            existing_row = db.execute(
+                select(Document.id, Document.chunk_count, Document.total_tokens,
+                       Document.status)
+                .where(Document.sha256 == sha256)
+            ).first()
+            if existing_row:
+                if existing_row.status != "failed":
+                    spool.close()
+                    logger.info("Document already exists: %s (doc_id: %s)", filename, existing_row.id)
+                    return {
+                        "message": "Document already exists",
+                        "document_id": existing_row.id,
+                        "chunk_count": existing_row.chunk_count,
+                        "total_tokens": existing_row.total_tokens,
+                        "status": existing_row.status
+                    }
+                # Indexing failed last time: re-ingest over the same row via
+                # the upsert below, clearing any partially uploaded vectors
+                # the way a reindex does
+                existing_doc = db.query(Document).filter(Document.sha256 == sha256).first()
+                logger.info("Retrying ingest for failed document: %s (doc_id: %s)", filename, existing_doc.id)
+        else:
+            # Reindex path needs the full instance so it can be deleted below
+            existing_doc = db.query(Document).filter(Document.sha256 == sha256).first()
+            if existing_doc:
+                logger.info("Force reindex requested for existing document: %s (doc_id: %s)", filename, existing_doc.id)
         
-        # Check if document already exists
+        # Parse metadata once up front; the Qdrant payload stores the parsed
+        # object so search never has to json.loads it per result
+        try:
+            metadata = json.loads(metadata_json) if metadata_json else {}
+        except json.JSONDecodeError:
+            spool.close()
+            raise HTTPException(status_code=400, detail="metadata_json is not valid JSON")
+
+        # Heavy singletons are only touched once the fast-fail paths above
+        # (dedup hit, hash mismatch, bad metadata) are behind us
         processor = get_processor()
         vectorstore = get_vectorstore()
-        
-        sha256 = processor.compute_sha256(content)
-        logger.debug(f"Document SHA256: {sha256}")
-        
-        existing_doc = db.query(Document).filter(Document.sha256 == sha256).first()
-        
-        if existing_doc and not force_reindex:
-            logger.info(f"Document already exists: {filename} (doc_id: {existing_doc.id})")
-            return {
-                "message": "Document already exists",
-                "document_id": existing_doc.id,
-                "chunk_count": existing_doc.chunk_count,
-                "total_tokens": existing_doc.total_tokens
-            }
-        
-        if existing_doc and force_reindex:
-            logger.info(f"Force reindex requested for existing document: {filename} (doc_id: {existing_doc.id})")
-        
-        # Process document
-        logger.info(f"Processing document: {filename}")
-        result = processor.process_document(
-            content=content,
+
+        # Process document. On reindex, the old-vector purge in Qdrant is
+        # independent of re-embedding the new content, so overlap the network
+        # round trip with the CPU-bound processing
+        logger.info("Processing document: %s", filename)
+        process_call = asyncio.to_thread(
+            processor.process_document_stream,
+            spool,
             content_type=file.content_type or "text/plain",
             filename=filename,
-            metadata_json=metadata_json
+            metadata_json=metadata_json,
+            sha256=sha256
         )
-        
-        logger.info(f"Document processed: {len(result['chunks'])} chunks, {result['total_tokens']} tokens")
-        
-        # Delete existing document if reindexing
         if existing_doc:
-            logger.info(f"Deleting existing document vectors: {existing_doc.id}")
-            vectorstore.delete_by_doc_id(existing_doc.id)
-            db.delete(existing_doc)
-            db.commit()
-            logger.info(f"Deleted existing document: {existing_doc.id}")
-        
-        # Create document record
-        doc = Document(
+            logger.info("Deleting existing document vectors: %s", existing_doc.id)
+            result, _ = await asyncio.gather(
+                process_call,
+                asyncio.to_thread(vectorstore.delete_by_doc_id, existing_doc.id)
+            )
+        else:
+            result = await process_call
+        spool.close()
+
+        logger.info("Document processed: %s chunks, %s tokens", len(result['texts']), result['total_tokens'])
+
+        # Create (or, on reindex, atomically replace) the document record via
+        # a single SQLite upsert: one statement with RETURNING, one commit,
+        # no transient deleted state and half the fsyncs of delete+insert
+        content_type = file.content_type or "text/plain"
+        stmt = sqlite_insert(Document).values(
             name=filename,
-            content_type=file.content_type or "text/plain",
+            content_type=content_type,
             sha256=sha256,
             metadata_json=metadata_json,
-            chunk_count=len(result["chunks"]),
+            chunk_count=len(result["texts"]),
             total_tokens=result["total_tokens"],
-            status="ingested"
-        )
-        db.add(doc)
-        db.commit()
-        db.refresh(doc)
-        logger.info(f"Document record created: {doc.id}")
-        
-        # Prepare vectors and payloads for Qdrant
-        vectors = result["embeddings"]
-        payloads = []
-        ids = []
-        
-        logger.debug(f"Preparing {len(vectors)} vectors for Qdrant storage")
-        for idx, chunk in enumerate(result["chunks"]):
-            payload = {
-                "doc_id": doc.id,
-                "name": doc.name,
-                "content_type": doc.content_type,
-                "sha256": doc.sha256,
-                "chunk_index": chunk["chunk_index"],
-                "token_count": chunk["token_count"],
-                "chunk_text": chunk["text"],
+            status="pending"
+        ).on_conflict_do_update(
+            index_elements=["sha256"],
+            set_={
+                "name": filename,
+                "content_type": content_type,
                 "metadata_json": metadata_json,
-                "created_at": datetime.utcnow().isoformat()
+                "chunk_count": len(result["texts"]),
+                "total_tokens": result["total_tokens"],
+                "status": "pending"
             }
-            payloads.append(payload)
-            # Generate UUID for each point (Qdrant requires valid UUID or integer)
-            # We can't use {doc_id}_{chunk_index} format as it's not a valid UUID
-            point_id = str(uuid.uuid4())
-            ids.append(point_id)
+        ).returning(Document.id)
+
+        def _insert_document():
+            doc_id = db.execute(stmt).scalar_one()
+            db.commit()
+            return doc_id
+
+        doc_id = await asyncio.to_thread(_insert_document)
+        logger.info("Document record created: %s", doc_id)
         
-        # Store vectors in Qdrant
-        logger.info(f"Storing {len(vectors)} vectors in Qdrant")
-        vectorstore.add_vectors(vectors, payloads, ids)
-        logger.info(f"Successfully stored vectors in Qdrant for document: {doc.id}")
+        # Prepare vectors and payloads for Qdrant. Doc-level fields are
+        # invariant across chunks, so build them once and share structurally
+        vectors = result["embeddings"]
+        logger.debug("Preparing %s vectors for Qdrant storage", len(vectors))
+
+        base_payload = {
+            "doc_id": doc_id,
+            "name": filename,
+            "content_type": content_type,
+            "sha256": sha256,
+            "metadata": metadata,
+            # Recorded so point inspection can report dimensionality without
+            # fetching the vector itself
+            "vector_dim": int(vectors.shape[1]),
+            "created_at": datetime.utcnow().isoformat()
+        }
+        payloads = [
+            {
+                **base_payload,
+                "chunk_index": chunk_index,
+                "token_count": token_count,
+                "chunk_text": chunk_text,
+                # Precomputed so listings can project a small payload instead
+                # of shipping full chunk_text and truncating client-side
+                "chunk_text_preview": (
+                    chunk_text[:200] + "..." if len(chunk_text) > 200 else chunk_text
+                )
+            }
+            for chunk_index, token_count, chunk_text in zip(
+                result["chunk_indices"].tolist(),
+                result["token_counts"].tolist(),
+                result["texts"]
+            )
+        ]
+        # Raw {doc_id}_{chunk_index} strings aren't valid Qdrant IDs, so the
+        # pair is folded into a UUIDv5 instead
+        ids = _chunk_point_ids(doc_id, len(result["texts"]))
         
+        # Store vectors in Qdrant in the background so the response doesn't
+        # block on the HNSW insert; poll /documents/{id}/status for completion
+        logger.info("Scheduling background storage of %s vectors in Qdrant", len(vectors))
+        _spawn_bg_task(_upload_vectors_bg(doc_id, vectors, payloads, ids))
+
         response = {
             "message": "Document ingested successfully",
-            "document_id": doc.id,
-            "chunk_count": doc.chunk_count,
-            "total_tokens": doc.total_tokens,
-            "sha256": sha256
+            "document_id": doc_id,
+            "chunk_count": len(result["texts"]),
+            "total_tokens": result["total_tokens"],
+            "sha256": sha256,
+            "status": "pending"
         }
-        
-        logger.info(f"Document upload completed successfully: {filename} (doc_id: {doc.id}, chunks: {doc.chunk_count}, tokens: {doc.total_tokens})")
+
+        logger.info("Document upload completed successfully: %s (doc_id: %s, chunks: %s, tokens: %s)", filename, doc_id, len(result['texts']), result['total_tokens'])
         return response
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error uploading document {filename}: {e}", exc_info=True)
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error uploading document %s: %s", filename, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/search")
+def smart_encode(model, texts: List[str], batch_size: int = 32):
+    """
+    Encode texts in length-sorted order, then restore the original order.
+
+    Batches of similar-length texts waste less compute on padding, which is
+    where most of the cost goes for heterogeneous query batches on CPU.
+    """
+    order = np.argsort([len(text) for text in texts])
+    sorted_texts = [texts[i] for i in order]
+    embeddings = model.encode(
+        sorted_texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    inverse = np.argsort(order)
+    return embeddings[inverse]
+
+
+def _format_search_results(results: List[dict]) -> List[dict]:
+    """Format raw Qdrant search hits into the API result shape."""
+    formatted_results = []
+    for result in results:
+        payload = result["payload"]
+        # Payloads store parsed metadata; fall back to the stringified
+        # metadata_json field for points ingested before that change
+        metadata = payload.get("metadata")
+        if metadata is None and payload.get("metadata_json"):
+            metadata = json.loads(payload["metadata_json"])
+        formatted_results.append({
+            "score": result["score"],
+            "document_id": payload.get("doc_id"),
+            "document_name": payload.get("name"),
+            "chunk_index": payload.get("chunk_index"),
+            "chunk_text": payload.get("chunk_text", ""),
+            "token_count": payload.get("token_count", 0),
+            "metadata": metadata or {}
+        })
+    return formatted_results
+
+
+@router.post("/search", response_model=SearchResponse)
 async def search_documents(
     request: SearchRequest = Body(...),
     db: Session = Depends(get_db)
 ):
     """Search for similar document chunks."""
-    logger.info(f"Search requested: query='{request.query[:50]}...' (top_k={request.top_k}, filters={request.filters})")
+    logger.info("Search requested: query='%s...' (top_k=%s, filters=%s)", request.query[:50], request.top_k, request.filters)
     
     try:
-        processor = get_processor()
         vectorstore = get_vectorstore()
-        
-        # Generate query embedding
+
+        # Generate query embedding (cached for repeated queries)
         logger.debug("Generating query embedding")
-        query_embedding = processor.embedding_model.encode(request.query, show_progress_bar=False).tolist()
-        logger.debug(f"Query embedding generated: {len(query_embedding)} dimensions")
+        query_embedding = await get_query_embedding(request.query)
+        logger.debug("Query embedding generated: %s dimensions", len(query_embedding))
         
         # Search in Qdrant
-        logger.debug(f"Searching Qdrant with top_k={request.top_k}")
-        results = vectorstore.search(
+        logger.debug("Searching Qdrant with top_k=%s", request.top_k)
+        results = await asyncio.to_thread(
+            vectorstore.search,
             query_vector=query_embedding,
             top_k=request.top_k,
             filters=request.filters
         )
-        logger.info(f"Qdrant search returned {len(results)} results")
+        logger.info("Qdrant search returned %s results", len(results))
         
         # Format results
-        formatted_results = []
-        for result in results:
-            payload = result["payload"]
-            formatted_results.append({
-                "score": result["score"],
-                "document_id": payload.get("doc_id"),
-                "document_name": payload.get("name"),
-                "chunk_index": payload.get("chunk_index"),
-                "chunk_text": payload.get("chunk_text", ""),
-                "token_count": payload.get("token_count", 0),
-                "metadata": json.loads(payload.get("metadata_json", "{}")) if payload.get("metadata_json") else {}
-            })
-        
+        formatted_results = _format_search_results(results)
+
         response = {
             "query": request.query,
             "results": formatted_results,
             "total_results": len(formatted_results)
         }
         
-        logger.info(f"Search completed: {len(formatted_results)} results returned")
+        logger.info("Search completed: %s results returned", len(formatted_results))
         return response
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error during search: {e}", exc_info=True)
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error during search: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/search/batch")
+async def search_documents_batch(
+    request: BatchSearchRequest = Body(...),
+    db: Session = Depends(get_db)
+):
+    """Search for similar chunks for many queries in one batched call."""
+    logger.info("Batch search requested: %s queries (top_k=%s, filters=%s)", len(request.queries), request.top_k, request.filters)
+
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="No queries provided")
+
+    try:
+        processor = get_processor()
+        vectorstore = get_vectorstore()
+
+        # One batched forward pass for all queries, then one Qdrant batch call
+        logger.debug("Generating %s query embeddings", len(request.queries))
+        embeddings = await asyncio.to_thread(
+            smart_encode,
+            processor.embedding_model,
+            request.queries
+        )
+
+        logger.debug("Batch searching Qdrant with top_k=%s", request.top_k)
+        batch_results = await asyncio.to_thread(
+            vectorstore.search_batch,
+            embeddings,
+            request.top_k,
+            request.filters
+        )
+
+        responses = [
+            {
+                "query": query,
+                "results": _format_search_results(results),
+                "total_results": len(results)
+            }
+            for query, results in zip(request.queries, batch_results)
+        ]
+
+        logger.info("Batch search completed: %s queries", len(responses))
+        return {"searches": responses, "total_queries": len(responses)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error during batch search: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+_DOCUMENT_COLUMNS = (
+    Document.id, Document.name, Document.content_type,
+    Document.sha256, Document.created_at, Document.updated_at,
+    Document.status, Document.metadata_json,
+    Document.chunk_count, Document.total_tokens
+)
+
+
+def _document_row_dict(row) -> dict:
+    """Convert a Core document row to the wire dict (ISO datetimes)."""
+    d = dict(row._mapping)
+    for key in ("created_at", "updated_at"):
+        if d.get(key) is not None:
+            d[key] = d[key].isoformat()
+    return d
+
+
 @router.get("/documents")
-async def list_documents(db: Session = Depends(get_db)):
-    """List all ingested documents."""
-    logger.info("Listing all documents")
-    
+async def list_documents(
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """List ingested documents, newest first, with keyset pagination."""
+    logger.info("Listing documents (limit=%s, after_id=%s)", limit, after_id)
+
     try:
-        documents = db.query(Document).order_by(Document.created_at.desc()).all()
-        logger.info(f"Found {len(documents)} documents")
-        
+        # Core select returns plain rows, skipping ORM hydration + to_dict()
+        stmt = select(*_DOCUMENT_COLUMNS).order_by(
+            Document.created_at.desc(), Document.id.desc()
+        ).limit(limit)
+
+        if after_id:
+            after_row = db.execute(
+                select(Document.created_at, Document.id)
+                .where(Document.id == after_id)
+            ).first()
+            if not after_row:
+                raise HTTPException(status_code=404, detail="after_id document not found")
+            stmt = stmt.where(
+                (Document.created_at < after_row.created_at)
+                | ((Document.created_at == after_row.created_at)
+                   & (Document.id < after_row.id))
+            )
+
+        rows = db.execute(stmt).all()
+        logger.info("Found %s documents", len(rows))
+
         return {
-            "documents": [doc.to_dict() for doc in documents],
-            "total": len(documents)
+            "documents": [_document_row_dict(row) for row in rows],
+            "total": len(rows),
+            "next_after_id": rows[-1].id if len(rows) == limit else None
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error listing documents: {e}", exc_info=True)
+        logger.error("Error listing documents: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/documents.ndjson")
+async def export_documents_ndjson(db: Session = Depends(get_db)):
+    """Stream all documents as NDJSON with constant memory."""
+    logger.info("Streaming document export requested")
+
+    def generate():
+        result = db.execute(
+            select(*_DOCUMENT_COLUMNS)
+            .order_by(Document.created_at.desc(), Document.id.desc())
+            .execution_options(yield_per=500)
+        )
+        for row in result:
+            yield json.dumps(_document_row_dict(row)) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/documents/{doc_id}")
 async def get_document(doc_id: str, db: Session = Depends(get_db)):
     """Get document details."""
-    logger.info(f"Getting document details: {doc_id}")
+    logger.info("Getting document details: %s", doc_id)
     
     try:
-        doc = db.query(Document).filter(Document.id == doc_id).first()
-        if not doc:
-            logger.warning(f"Document not found: {doc_id}")
+        # Narrow Core select: no ORM hydration or identity-map bookkeeping
+        row = db.execute(
+            select(*_DOCUMENT_COLUMNS).where(Document.id == doc_id)
+        ).first()
+        if not row:
+            logger.warning("Document not found: %s", doc_id)
             raise HTTPException(status_code=404, detail="Document not found")
-        
-        logger.debug(f"Document found: {doc.name}")
-        return doc.to_dict()
+
+        logger.debug("Document found: %s", row.name)
+        return _document_row_dict(row)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting document {doc_id}: {e}", exc_info=True)
+        logger.error("Error getting document %s: %s", doc_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/documents/{doc_id}/status")
+async def get_document_status(doc_id: str, db: Session = Depends(get_db)):
+    """Get document indexing status (pending/indexed/failed)."""
+    logger.debug("Getting document status: %s", doc_id)
+
+    doc = db.query(Document).filter(Document.id == doc_id).first()
+    if not doc:
+        logger.warning("Document not found: %s", doc_id)
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return {
+        "document_id": doc.id,
+        "status": doc.status,
+        "chunk_count": doc.chunk_count,
+        "total_tokens": doc.total_tokens
+    }
+
+
 @router.delete("/documents/{doc_id}")
 async def delete_document(doc_id: str, db: Session = Depends(get_db)):
     """Delete a document and its vectors."""
-    logger.info(f"Delete document requested: {doc_id}")
+    logger.info("Delete document requested: %s", doc_id)
     
     try:
-        doc = db.query(Document).filter(Document.id == doc_id).first()
+        doc = db.execute(
+            select(Document.id, Document.name, Document.chunk_count)
+            .where(Document.id == doc_id)
+        ).first()
         if not doc:
-            logger.warning(f"Document not found for deletion: {doc_id}")
+            logger.warning("Document not found for deletion: %s", doc_id)
             raise HTTPException(status_code=404, detail="Document not found")
-        
-        logger.info(f"Deleting document: {doc.name} (doc_id: {doc_id}, chunks: {doc.chunk_count})")
+
+        logger.info("Deleting document: %s (doc_id: %s, chunks: %s)", doc.name, doc_id, doc.chunk_count)
         
         # Delete from Qdrant first
         qdrant_deleted = False
         try:
             vectorstore = get_vectorstore()
-            logger.debug(f"Deleting vectors from Qdrant for document: {doc_id}")
-            vectorstore.delete_by_doc_id(doc_id)
+            logger.debug("Deleting vectors from Qdrant for document: %s", doc_id)
+            await asyncio.to_thread(vectorstore.delete_by_doc_id, doc_id)
             qdrant_deleted = True
-            logger.info(f"Successfully deleted {doc.chunk_count} chunks from Qdrant for document: {doc_id}")
+            logger.info("Successfully deleted %s chunks from Qdrant for document: %s", doc.chunk_count, doc_id)
         except Exception as e:
-            logger.error(f"Error deleting vectors from Qdrant for document {doc_id}: {e}", exc_info=True)
+            logger.error("Error deleting vectors from Qdrant for document %s: %s", doc_id, e, exc_info=True)
             # Continue with database deletion even if Qdrant deletion fails
             # This prevents orphaned database records
         
-        # Delete from database
+        # Delete from database with a Core DELETE (no instance to expire)
         try:
-            db.delete(doc)
+            db.execute(delete(Document).where(Document.id == doc_id))
             db.commit()
-            logger.info(f"Document deleted from database: {doc_id}")
+            logger.info("Document deleted from database: %s", doc_id)
         except Exception as e:
-            logger.error(f"Error deleting document from database {doc_id}: {e}", exc_info=True)
+            logger.error("Error deleting document from database %s: %s", doc_id, e, exc_info=True)
             db.rollback()
             raise HTTPException(status_code=500, detail=f"Failed to delete document from database: {str(e)}")
-        
+
         if not qdrant_deleted:
-            logger.warning(f"Document {doc_id} deleted from database but Qdrant cleanup failed. Manual cleanup may be required.")
+            logger.warning("Document %s deleted from database but Qdrant cleanup failed. Manual cleanup may be required.", doc_id)
             return {
                 "message": "Document deleted from database, but some chunks may remain in Qdrant",
                 "document_id": doc_id,
                 "warning": "Qdrant cleanup failed"
             }
         
-        logger.info(f"Document deleted successfully: {doc_id}")
+        logger.info("Document deleted successfully: %s", doc_id)
         return {"message": "Document and all chunks deleted successfully", "document_id": doc_id}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting document {doc_id}: {e}", exc_info=True)
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error deleting document %s: %s", doc_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -361,57 +882,67 @@ async def delete_documents(
     db: Session = Depends(get_db)
 ):
     """Delete multiple documents and their vectors."""
-    logger.info(f"Bulk delete requested: {len(request.document_ids)} documents")
+    logger.info("Bulk delete requested: %s documents", len(request.document_ids))
     
     if not request.document_ids:
         raise HTTPException(status_code=400, detail="No document IDs provided")
     
+    # One lean SELECT ... WHERE id IN (...) instead of a query per document
+    rows = db.execute(
+        select(Document.id, Document.name, Document.chunk_count)
+        .where(Document.id.in_(request.document_ids))
+    ).all()
+    found = {row.id: row for row in rows}
+
+    failed_docs = [
+        {"doc_id": doc_id, "error": "Document not found"}
+        for doc_id in request.document_ids
+        if doc_id not in found
+    ]
+    for entry in failed_docs:
+        logger.warning("Document not found for deletion: %s", entry["doc_id"])
+
     deleted_docs = []
-    failed_docs = []
-    
-    for doc_id in request.document_ids:
+    if found:
+        doc_ids = list(found)
+
+        # One filtered Qdrant delete covers every document's vectors
+        qdrant_deleted = False
+        try:
+            vectorstore = get_vectorstore()
+            logger.debug("Deleting vectors from Qdrant for %s documents", len(doc_ids))
+            await asyncio.to_thread(vectorstore.delete_by_doc_ids, doc_ids)
+            qdrant_deleted = True
+            logger.info("Deleted vectors from Qdrant for %s documents", len(doc_ids))
+        except Exception as e:
+            logger.error("Error deleting vectors from Qdrant: %s", e, exc_info=True)
+            # Continue with database deletion even if Qdrant deletion fails
+
+        # One DELETE ... WHERE id IN (...) and a single commit (one fsync)
         try:
-            doc = db.query(Document).filter(Document.id == doc_id).first()
-            if not doc:
-                logger.warning(f"Document not found for deletion: {doc_id}")
-                failed_docs.append({"doc_id": doc_id, "error": "Document not found"})
-                continue
-            
-            logger.info(f"Deleting document: {doc.name} (doc_id: {doc_id}, chunks: {doc.chunk_count})")
-            
-            # Delete from Qdrant first
-            qdrant_deleted = False
-            try:
-                vectorstore = get_vectorstore()
-                logger.debug(f"Deleting vectors from Qdrant for document: {doc_id}")
-                vectorstore.delete_by_doc_id(doc_id)
-                qdrant_deleted = True
-                logger.info(f"Successfully deleted {doc.chunk_count} chunks from Qdrant for document: {doc_id}")
-            except Exception as e:
-                logger.error(f"Error deleting vectors from Qdrant for document {doc_id}: {e}", exc_info=True)
-                # Continue with database deletion even if Qdrant deletion fails
-            
-            # Delete from database
-            try:
-                db.delete(doc)
+            def _delete_rows():
+                db.execute(delete(Document).where(Document.id.in_(doc_ids)))
                 db.commit()
-                logger.info(f"Document deleted from database: {doc_id}")
-                
-                deleted_docs.append({
-                    "doc_id": doc_id,
-                    "name": doc.name,
-                    "chunks_deleted": doc.chunk_count,
+            await asyncio.to_thread(_delete_rows)
+            logger.info("Deleted %s documents from database", len(doc_ids))
+
+            deleted_docs = [
+                {
+                    "doc_id": row.id,
+                    "name": row.name,
+                    "chunks_deleted": row.chunk_count,
                     "qdrant_cleaned": qdrant_deleted
-                })
-            except Exception as e:
-                logger.error(f"Error deleting document from database {doc_id}: {e}", exc_info=True)
-                db.rollback()
-                failed_docs.append({"doc_id": doc_id, "name": doc.name, "error": str(e)})
-        
+                }
+                for row in found.values()
+            ]
         except Exception as e:
-            logger.error(f"Unexpected error deleting document {doc_id}: {e}", exc_info=True)
-            failed_docs.append({"doc_id": doc_id, "error": str(e)})
-    
+            logger.error("Error deleting documents from database: %s", e, exc_info=True)
+            db.rollback()
+            failed_docs.extend(
+                {"doc_id": row.id, "name": row.name, "error": str(e)}
+                for row in found.values()
+            )
+
     response = {
         "message": f"Deleted {len(deleted_docs)} document(s)",
         "deleted_count": len(deleted_docs),
@@ -426,6 +957,66 @@ async def delete_documents(
     return response
 
 
+# Document count / total chunk aggregates, cached briefly: polled pages of
+# /qdrant/points would otherwise re-scan the documents table per request
+_DOC_STATS_TTL_S = 5.0
+_doc_stats_cache = {"ts": 0.0, "value": None}
+
+
+def _document_stats(db: Session):
+    """Return (doc_count, total_chunks) from one aggregate query, cached."""
+    now = time.monotonic()
+    if _doc_stats_cache["value"] is not None and now - _doc_stats_cache["ts"] < _DOC_STATS_TTL_S:
+        return _doc_stats_cache["value"]
+
+    row = db.query(
+        func.count(Document.id),
+        func.coalesce(func.sum(Document.chunk_count), 0)
+    ).one()
+    value = (row[0], row[1])
+    _doc_stats_cache["value"] = value
+    _doc_stats_cache["ts"] = now
+    return value
+
+
+@functools.lru_cache(maxsize=1024)
+def _doc_filter(doc_id: str) -> Filter:
+    """Build (and cache) the Qdrant filter matching a single document."""
+    return Filter(
+        must=[FieldCondition(key="doc_id", match=MatchValue(value=doc_id))]
+    )
+
+
+_collection_config_cache = None
+
+
+def _collection_config():
+    """
+    Fetch (vector_size, distance) for the collection via the shared client.
+
+    Collection config doesn't change at runtime, so a successful lookup is
+    memoized for the life of the process; the error fallback is returned
+    but never cached, so a transient Qdrant outage on the first call
+    doesn't freeze the defaults forever.
+    """
+    global _collection_config_cache
+    if _collection_config_cache is not None:
+        return _collection_config_cache
+    try:
+        vectorstore = get_vectorstore()
+        info = vectorstore.client.get_collection(vectorstore.collection_name)
+        vectors_config = info.config.params.vectors
+        if vectors_config is not None and hasattr(vectors_config, "size"):
+            _collection_config_cache = (
+                vectors_config.size,
+                str(vectors_config.distance).upper().rsplit(".", 1)[-1]
+            )
+            return _collection_config_cache
+    except Exception as e:
+        logger.warning("Could not fetch collection config: %s", e)
+    return 384, "COSINE"
+
+
 @router.get("/qdrant/stats")
 async def get_qdrant_stats(db: Session = Depends(get_db)):
     """Get Qdrant collection statistics."""
@@ -438,29 +1029,11 @@ async def get_qdrant_stats(db: Session = Depends(get_db)):
         count_result = vectorstore.client.count(vectorstore.collection_name)
         total_points = count_result.count
         
-        # Get document count from SQLite
-        doc_count = db.query(Document).count()
-        
-        # Try to get collection info via HTTP API
-        vector_size = 384
-        distance = "COSINE"
-        try:
-            import requests
-            response = requests.get(
-                f"http://{settings.qdrant_host}:{settings.qdrant_port}/collections/{vectorstore.collection_name}",
-                timeout=5
-            )
-            if response.status_code == 200:
-                data = response.json().get('result', {})
-                if 'config' in data:
-                    params = data['config'].get('params', {})
-                    vectors_config = params.get('vectors', {})
-                    if isinstance(vectors_config, dict):
-                        vector_size = vectors_config.get('size', 384)
-                        distance = vectors_config.get('distance', 'COSINE')
-        except:
-            pass
+        # Get document count from SQLite (single cached aggregate)
+        doc_count, _ = _document_stats(db)
         
+        vector_size, distance = await asyncio.to_thread(_collection_config)
+
         return {
             "collection_name": vectorstore.collection_name,
             "total_points": total_points,
@@ -470,7 +1043,26 @@ async def get_qdrant_stats(db: Session = Depends(get_db)):
             "average_chunks_per_doc": round(total_points / doc_count, 2) if doc_count > 0 else 0
         }
     except Exception as e:
-        logger.error(f"Error getting Qdrant stats: {e}", exc_info=True)
+        logger.error("Error getting Qdrant stats: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/qdrant/optimize")
+async def optimize_qdrant_collection():
+    """Enable int8 scalar quantization on the collection (admin operation)."""
+    logger.info("Qdrant optimize requested: enabling int8 scalar quantization")
+
+    try:
+        vectorstore = get_vectorstore()
+        await asyncio.to_thread(vectorstore.enable_quantization)
+
+        logger.info("Quantization enabled for collection '%s'", vectorstore.collection_name)
+        return {
+            "message": "Scalar quantization (int8, always_ram) enabled",
+            "collection_name": vectorstore.collection_name
+        }
+    except Exception as e:
+        logger.error("Error enabling quantization: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -482,20 +1074,13 @@ async def get_qdrant_points(
     db: Session = Depends(get_db)
 ):
     """Get points from Qdrant collection."""
-    logger.info(f"Qdrant points requested: limit={limit}, offset={offset}, doc_id={doc_id}")
+    logger.info("Qdrant points requested: limit=%s, offset=%s, doc_id=%s", limit, offset, doc_id)
     
     try:
         vectorstore = get_vectorstore()
         
-        # Build filter if doc_id provided
-        scroll_filter = None
-        if doc_id:
-            from qdrant_client.models import Filter, FieldCondition, MatchValue
-            scroll_filter = Filter(
-                must=[
-                    FieldCondition(key="doc_id", match=MatchValue(value=doc_id))
-                ]
-            )
+        # Build filter if doc_id provided (cached per doc_id)
+        scroll_filter = _doc_filter(doc_id) if doc_id else None
         
         # Scroll to get points
         # Note: Qdrant scroll uses offset as point ID for pagination, not integer offset
@@ -506,12 +1091,15 @@ async def get_qdrant_points(
         # For now, we'll use simple scrolling without offset-based pagination
         # Instead, we'll use limit-based pagination which is simpler
         
+        # Project only the listing fields server-side: chunk_text is by far
+        # the largest payload key and the listing only needs its preview
         scroll_result = vectorstore.client.scroll(
             collection_name=vectorstore.collection_name,
             scroll_filter=scroll_filter,
             limit=limit,
             offset=scroll_offset,  # Use None for first page, point ID for next pages
-            with_payload=True,
+            with_payload=["doc_id", "name", "chunk_index", "token_count",
+                          "chunk_text_preview", "created_at"],
             with_vectors=False  # Don't return full vectors (too large)
         )
         
@@ -520,9 +1108,8 @@ async def get_qdrant_points(
         # next_page_offset is either None or a point ID to use for next page
         next_offset = scroll_result[1] if len(scroll_result) > 1 else None
         
-        # Check for data mismatch
-        db_doc_count = db.query(Document).count()
-        total_db_chunks = db.query(func.sum(Document.chunk_count)).scalar() or 0
+        # Check for data mismatch (one cached aggregate instead of two scans)
+        db_doc_count, total_db_chunks = _document_stats(db)
         
         if len(points) == 0 and total_db_chunks > 0:
             logger.warning(
@@ -539,7 +1126,10 @@ async def get_qdrant_points(
                 "document_name": payload.get("name"),
                 "chunk_index": payload.get("chunk_index"),
                 "token_count": payload.get("token_count", 0),
-                "chunk_text_preview": payload.get("chunk_text", "")[:200] + "..." if len(payload.get("chunk_text", "")) > 200 else payload.get("chunk_text", ""),
+                # Points ingested before chunk_text_preview existed have no
+                # preview in the projected payload; they show empty until
+                # reindexed
+                "chunk_text_preview": payload.get("chunk_text_preview", ""),
                 "created_at": payload.get("created_at")
             })
         
@@ -559,48 +1149,49 @@ async def get_qdrant_points(
         
         return response
     except Exception as e:
-        logger.error(f"Error getting Qdrant points: {e}", exc_info=True)
+        logger.error("Error getting Qdrant points: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/qdrant/points/{point_id}")
-async def get_qdrant_point(point_id: str, db: Session = Depends(get_db)):
+async def get_qdrant_point(
+    point_id: str,
+    include_vector: bool = False,
+    db: Session = Depends(get_db)
+):
     """Get a specific point from Qdrant."""
-    logger.info(f"Qdrant point requested: {point_id}")
-    
+    logger.info("Qdrant point requested: %s (include_vector=%s)", point_id, include_vector)
+
     try:
         vectorstore = get_vectorstore()
-        
-        # Retrieve point by ID
+
+        # Retrieve point by ID. The full vector is only shipped when the
+        # caller opts in; dimensionality comes from the ingest-time payload
         result = vectorstore.client.retrieve(
             collection_name=vectorstore.collection_name,
             ids=[point_id],
             with_payload=True,
-            with_vectors=True
+            with_vectors=include_vector
         )
-        
+
         if not result:
             raise HTTPException(status_code=404, detail="Point not found")
-        
+
         point = result[0]
         payload = point.payload
-        
-        # Handle vector - it might be a list or numpy array
-        vector_preview = []
-        if point.vector:
-            if hasattr(point.vector, 'tolist'):
-                # It's a numpy array
-                vector_preview = point.vector[:10].tolist()
-            elif isinstance(point.vector, list):
-                # It's already a list
-                vector_preview = point.vector[:10]
-            else:
-                # Try to convert to list
-                vector_preview = list(point.vector[:10])
-        
+
+        # The vector may be a list or a numpy array; orjson serializes numpy
+        # natively (OPT_SERIALIZE_NUMPY), so the slice goes out as-is
+        vector_preview = point.vector[:10] if point.vector is not None else []
+
+        vector_dim = payload.get("vector_dim")
+        if vector_dim is None:
+            # Points ingested before vector_dim was recorded
+            vector_dim = len(point.vector) if point.vector is not None else 0
+
         return {
             "id": str(point.id),
-            "vector_dimensions": len(point.vector) if point.vector else 0,
+            "vector_dimensions": vector_dim,
             "vector_preview": vector_preview,  # First 10 dimensions
             "payload": {
                 "doc_id": payload.get("doc_id"),
@@ -617,7 +1208,7 @@ async def get_qdrant_point(point_id: str, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting Qdrant point {point_id}: {e}", exc_info=True)
+        logger.error("Error getting Qdrant point %s: %s", point_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -632,7 +1223,7 @@ async def delete_qdrant_points(
     db: Session = Depends(get_db)
 ):
     """Delete multiple points from Qdrant and update document metadata."""
-    logger.info(f"Bulk delete requested: {len(request.point_ids)} points")
+    logger.info("Bulk delete requested: %s points", len(request.point_ids))
     
     if not request.point_ids:
         raise HTTPException(status_code=400, detail="No point IDs provided")
@@ -652,7 +1243,7 @@ async def delete_qdrant_points(
             )
             points_to_delete = result
         except Exception as e:
-            logger.warning(f"Could not retrieve some points before deletion: {e}")
+            logger.warning("Could not retrieve some points before deletion: %s", e)
         
         # Group points by doc_id for metadata updates
         doc_points_map = {}  # {doc_id: [point_ids]}
@@ -669,66 +1260,52 @@ async def delete_qdrant_points(
         # Delete points from Qdrant
         try:
             vectorstore.delete_points(request.point_ids)
-            logger.info(f"Successfully deleted {len(request.point_ids)} points from Qdrant")
+            logger.info("Successfully deleted %s points from Qdrant", len(request.point_ids))
         except Exception as e:
-            logger.error(f"Error deleting points from Qdrant: {e}", exc_info=True)
+            logger.error("Error deleting points from Qdrant: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=f"Failed to delete points: {str(e)}")
         
-        # Update document metadata in SQLite
+        # Update document metadata in SQLite. The deleted points' payloads
+        # were already retrieved above, so the new counts are just deltas —
+        # no need to scroll each document's remaining chunks back over the
+        # network. One IN query fetches the rows, one commit persists them.
         updated_docs = []
-        for doc_id, points_info in doc_points_map.items():
-            try:
-                doc = db.query(Document).filter(Document.id == doc_id).first()
-                if not doc:
-                    logger.warning(f"Document {doc_id} not found in database, skipping metadata update")
-                    continue
-                
-                # Get remaining chunks for this document from Qdrant
-                from qdrant_client.models import Filter, FieldCondition, MatchValue
-                scroll_result = vectorstore.client.scroll(
-                    collection_name=vectorstore.collection_name,
-                    scroll_filter=Filter(
-                        must=[
-                            FieldCondition(key="doc_id", match=MatchValue(value=doc_id))
-                        ]
-                    ),
-                    limit=10000,
-                    with_payload=True,
-                    with_vectors=False
-                )
-                
-                remaining_points = scroll_result[0]
-                new_chunk_count = len(remaining_points)
-                new_total_tokens = sum(
-                    point.payload.get("token_count", 0) 
-                    for point in remaining_points
-                )
-                
-                # Update document record
-                doc.chunk_count = new_chunk_count
-                doc.total_tokens = new_total_tokens
-                doc.updated_at = datetime.utcnow()
-                
+        try:
+            docs = db.query(Document).filter(
+                Document.id.in_(list(doc_points_map))
+            ).all() if doc_points_map else []
+            found_ids = {doc.id for doc in docs}
+            for doc_id in doc_points_map:
+                if doc_id not in found_ids:
+                    logger.warning("Document %s not found in database, skipping metadata update", doc_id)
+
+            now = datetime.utcnow()
+            for doc in docs:
+                points_info = doc_points_map[doc.id]
+                deleted_tokens = sum(p["token_count"] for p in points_info)
+                doc.chunk_count = max(0, doc.chunk_count - len(points_info))
+                doc.total_tokens = max(0, doc.total_tokens - deleted_tokens)
+                doc.updated_at = now
+
                 # If all chunks deleted, keep status as "ingested" (document still exists)
-                db.commit()
-                
                 updated_docs.append({
-                    "doc_id": doc_id,
+                    "doc_id": doc.id,
                     "name": doc.name,
-                    "new_chunk_count": new_chunk_count,
-                    "new_total_tokens": new_total_tokens
+                    "new_chunk_count": doc.chunk_count,
+                    "new_total_tokens": doc.total_tokens
                 })
-                
                 logger.info(
-                    f"Updated document {doc_id}: {new_chunk_count} chunks, "
-                    f"{new_total_tokens} tokens (deleted {len(points_info)} chunks)"
+                    "Updated document %s: %s chunks, %s tokens (deleted %s chunks)",
+                    doc.id, doc.chunk_count, doc.total_tokens, len(points_info)
                 )
-                
-            except Exception as e:
-                logger.error(f"Error updating document {doc_id} metadata: {e}", exc_info=True)
-                # Continue with other documents even if one fails
-                db.rollback()
-        
+
+            db.commit()
+        except Exception as e:
+            logger.error("Error updating document metadata: %s", e, exc_info=True)
+            db.rollback()
+            updated_docs = []
+
+
         return {
             "message": "Points deleted successfully",
             "deleted_count": len(request.point_ids),
@@ -739,8 +1316,7 @@ async def delete_qdrant_points(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting Qdrant points: {e}", exc_info=True)
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error deleting Qdrant points: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -756,39 +1332,41 @@ async def delete_all_qdrant_points(db: Session = Depends(get_db)):
         try:
             count_result = vectorstore.client.count(collection_name=vectorstore.collection_name)
             total_points = count_result.count
-            logger.info(f"Qdrant collection has {total_points} points before deletion")
+            logger.info("Qdrant collection has %s points before deletion", total_points)
         except Exception as e:
-            logger.warning(f"Could not get point count before deletion: {e}")
+            logger.warning("Could not get point count before deletion: %s", e)
             total_points = 0
         
         # Delete all points
         logger.info("Starting deletion of all points from Qdrant")
         deleted_count = vectorstore.delete_all_points()
-        logger.warning(f"Deleted {deleted_count} points from Qdrant collection (expected {total_points})")
+        logger.warning("Deleted %s points from Qdrant collection (expected %s)", deleted_count, total_points)
         
         # Verify deletion
         try:
             count_result_after = vectorstore.client.count(collection_name=vectorstore.collection_name)
             remaining_points = count_result_after.count
             if remaining_points > 0:
-                logger.warning(f"Warning: {remaining_points} points still remain in Qdrant after deletion attempt")
+                logger.warning("Warning: %s points still remain in Qdrant after deletion attempt", remaining_points)
         except Exception as e:
-            logger.warning(f"Could not verify deletion: {e}")
+            logger.warning("Could not verify deletion: %s", e)
         
-        # Update all documents to have 0 chunks and 0 tokens
+        # Update all documents to have 0 chunks and 0 tokens: one UPDATE
+        # statement instead of hydrating every row and flushing N updates
         try:
-            documents = db.query(Document).all()
-            updated_count = 0
-            for doc in documents:
-                doc.chunk_count = 0
-                doc.total_tokens = 0
-                doc.updated_at = datetime.utcnow()
-                updated_count += 1
-            
+            updated_count = db.query(Document).update(
+                {
+                    Document.chunk_count: 0,
+                    Document.total_tokens: 0,
+                    # Server-side timestamp (SQLite CURRENT_TIMESTAMP is UTC)
+                    Document.updated_at: func.now()
+                },
+                synchronize_session=False
+            )
             db.commit()
-            logger.info(f"Updated {updated_count} documents to have 0 chunks and 0 tokens")
+            logger.info("Updated %s documents to have 0 chunks and 0 tokens", updated_count)
         except Exception as e:
-            logger.error(f"Error updating document metadata after deleting all points: {e}", exc_info=True)
+            logger.error("Error updating document metadata after deleting all points: %s", e, exc_info=True)
             db.rollback()
             # Don't fail the request if metadata update fails, but log it
         
@@ -802,7 +1380,6 @@ async def delete_all_qdrant_points(db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting all Qdrant points: {e}", exc_info=True)
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error deleting all Qdrant points: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
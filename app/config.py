@@ -7,7 +7,14 @@ class Settings(BaseSettings):
     
     # Embedding Model
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_fp16: bool = False  # run the model in half precision
+    embedding_compile: bool = False  # torch.compile the transformer module
+    embedding_encode_batch_size: int = 64  # ingest-time encode batch size
     
+    # JSON ingestion: "keypath" flattens to key.path: value lines,
+    # "json" serializes sorted/indented JSON at C speed via orjson
+    json_flatten_mode: str = "keypath"
+
     # Chunking Configuration
     chunk_size_tokens: int = 500
     chunk_overlap_tokens: int = 50
@@ -18,8 +25,25 @@ class Settings(BaseSettings):
     # Qdrant Configuration
     qdrant_host: str = "qdrant"
     qdrant_port: int = 6333
+    qdrant_grpc_port: int = 6334
+    qdrant_prefer_grpc: bool = True
     qdrant_collection_name: str = "documents"
+    qdrant_concurrency: int = 4
+    qdrant_upsert_batch_size: int = 256
+    qdrant_quantization: bool = False  # int8 scalar quantization on create
+    vector_dtype: str = "float32"  # storage datatype at collection creation
     
+    # Upload limits
+    max_upload_bytes: int = 100 * 1024 * 1024
+
+    # Search Configuration
+    query_cache_size: int = 4096
+    embedding_batch_window_ms: int = 10
+    embedding_max_batch: int = 32
+
+    # Health check caching
+    health_ttl_s: float = 1.0
+
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
@@ -8,7 +8,7 @@ from app.db.database import Base
 class Document(Base):
     """Document metadata model."""
     __tablename__ = "documents"
-    
+
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     content_type = Column(String, nullable=False)
@@ -0,0 +1,69 @@
+"""Micro-batching coalescer for embedding model calls."""
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger("app.ingest.batcher")
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent encode requests into single batched model calls.
+
+    Queries arriving within a small window are collected and encoded together,
+    which exploits the model's batching speedup; each waiting coroutine gets
+    its own row of the result back via an asyncio.Future.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], "list"],
+        window_ms: Optional[int] = None,
+        max_batch: Optional[int] = None
+    ):
+        self.encode_fn = encode_fn
+        self.window_s = (window_ms if window_ms is not None else settings.embedding_batch_window_ms) / 1000.0
+        self.max_batch = max_batch if max_batch is not None else settings.embedding_max_batch
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._worker_task: Optional[asyncio.Task] = None
+
+    async def submit(self, text: str):
+        """Submit a text for encoding; returns its embedding when the batch runs."""
+        self._ensure_worker()
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, fut))
+        return await fut
+
+    def _ensure_worker(self):
+        """Start the background batching worker on first use."""
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """Pull items off the queue, batch them within the window, and encode."""
+        while True:
+            batch = [await self.queue.get()]
+
+            # Collect more items arriving within the window, up to max_batch
+            while len(batch) < self.max_batch:
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=self.window_s)
+                    batch.append(item)
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await asyncio.to_thread(self.encode_fn, texts)
+            except Exception as e:
+                logger.error("Batched encode failed for %s queries: %s", len(texts), e, exc_info=True)
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            for (_, fut), embedding in zip(batch, embeddings):
+                if not fut.done():
+                    fut.set_result(embedding)
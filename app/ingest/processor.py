@@ -1,6 +1,7 @@
 """Document processing: extraction, chunking, and embedding."""
 import hashlib
-import json
+import numpy as np
+import orjson
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
@@ -13,96 +14,195 @@ class DocumentProcessor:
     
     def __init__(self):
         self.embedding_model = SentenceTransformer(settings.embedding_model)
+        if settings.embedding_fp16:
+            # Halves the transformer forward-pass memory traffic; encode()
+            # still returns float32 numpy arrays, so callers are unaffected
+            self.embedding_model.half()
+        if settings.embedding_compile:
+            # Compile the underlying transformer; the first encode per batch
+            # shape pays the compile cost, which warmup() absorbs at startup
+            import torch
+            self.embedding_model[0].auto_model = torch.compile(
+                self.embedding_model[0].auto_model, mode="reduce-overhead"
+            )
         self.chunker = TokenChunker()
         self.vector_size = len(self.embedding_model.encode("test"))
-    
+        # Content-type dispatch table: one dict lookup instead of a branch
+        # chain, and new types register here without touching extract_text
+        self._extractors = {
+            "text/plain": self._extract_plain,
+            "text/markdown": self._extract_plain,
+            "application/json": self._extract_json,
+        }
+
     def extract_text(self, content: bytes, content_type: str, filename: str) -> str:
         """Extract text from document based on content type."""
-        if content_type in ["text/plain", "text/markdown"]:
-            return content.decode("utf-8")
-        
-        elif content_type == "application/json":
-            try:
-                data = json.loads(content.decode("utf-8"))
-                # Flatten JSON to text
-                return self._flatten_json(data)
-            except json.JSONDecodeError:
-                return content.decode("utf-8", errors="ignore")
-        
-        else:
-            # Try to decode as UTF-8 text
+        return self._extractors.get(content_type, self._extract_default)(content)
+
+    def _extract_plain(self, content: bytes) -> str:
+        """Decode plain text or markdown content."""
+        return content.decode("utf-8")
+
+    def _extract_json(self, content: bytes) -> str:
+        """Parse JSON content and flatten it to text."""
+        try:
+            # orjson parses the bytes directly (no intermediate str)
+            # with a C parser; it's the same library already serving
+            # API responses
+            data = orjson.loads(content)
+            # Flatten JSON to text
+            if settings.json_flatten_mode == "json":
+                # Canonical sorted/indented serialization straight from
+                # orjson; skips the Python-level key-path walk when
+                # embeddings don't need key.path: value lines
+                return orjson.dumps(
+                    data,
+                    option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2
+                ).decode("utf-8")
+            return self._flatten_json(data)
+        except orjson.JSONDecodeError:
             return content.decode("utf-8", errors="ignore")
+
+    def _extract_default(self, content: bytes) -> str:
+        """Fallback: try to decode as UTF-8 text."""
+        return content.decode("utf-8", errors="ignore")
     
     def _flatten_json(self, obj: Any, prefix: str = "") -> str:
-        """Flatten JSON object to text representation."""
+        """
+        Flatten JSON object to text representation.
+
+        Iterative: an explicit stack appends leaf lines to one output list,
+        so nested structures flatten in linear time instead of re-joining
+        and re-splitting strings at every recursion level. The stack holds
+        children in reverse so lines come out in document order.
+        """
         lines = []
-        
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                new_key = f"{prefix}.{key}" if prefix else key
-                if isinstance(value, (dict, list)):
-                    lines.extend(self._flatten_json(value, new_key).split("\n"))
-                else:
-                    lines.append(f"{new_key}: {value}")
-        
-        elif isinstance(obj, list):
-            for idx, item in enumerate(obj):
-                new_key = f"{prefix}[{idx}]" if prefix else f"[{idx}]"
-                if isinstance(item, (dict, list)):
-                    lines.extend(self._flatten_json(item, new_key).split("\n"))
-                else:
-                    lines.append(f"{new_key}: {item}")
-        
-        else:
-            lines.append(f"{prefix}: {obj}")
-        
+        stack = [(obj, prefix)]
+
+        while stack:
+            node, key = stack.pop()
+
+            if isinstance(node, dict):
+                for child_key, value in reversed(node.items()):
+                    new_key = f"{key}.{child_key}" if key else child_key
+                    stack.append((value, new_key))
+            elif isinstance(node, list):
+                for idx in range(len(node) - 1, -1, -1):
+                    new_key = f"{key}[{idx}]" if key else f"[{idx}]"
+                    stack.append((node[idx], new_key))
+            else:
+                lines.append(f"{key}: {node}")
+
         return "\n".join(lines)
     
     def compute_sha256(self, content: bytes) -> str:
-        """Compute SHA256 hash of content."""
+        """
+        Compute SHA256 hash of content.
+
+        hashlib delegates to OpenSSL's EVP implementation, which dispatches
+        to SHA-NI on CPUs that have it, so this is already the hardware-
+        accelerated path.
+        """
         return hashlib.sha256(content).hexdigest()
-    
+
+    def compute_sha256_stream(self, fileobj, chunk_size: int = 1 << 20) -> str:
+        """Compute SHA256 of a file object incrementally, without loading it whole."""
+        h = hashlib.sha256()
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+        return h.hexdigest()
+
+    def process_document_stream(
+        self,
+        fileobj,
+        content_type: str,
+        filename: str,
+        metadata_json: Optional[str] = None,
+        sha256: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a document from a (possibly disk-backed) file object.
+
+        Accepts a precomputed sha256 so callers that hashed the upload while
+        streaming it to a temp file don't pay for a second pass over the bytes.
+        """
+        fileobj.seek(0)
+        content = fileobj.read()
+        return self.process_document(
+            content=content,
+            content_type=content_type,
+            filename=filename,
+            metadata_json=metadata_json,
+            sha256=sha256
+        )
+
     def process_document(
         self,
         content: bytes,
         content_type: str,
         filename: str,
-        metadata_json: Optional[str] = None
+        metadata_json: Optional[str] = None,
+        sha256: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process a document: extract text, chunk, and generate embeddings.
-        
-        Returns:
-            Dict with keys: 'text', 'chunks', 'embeddings', 'sha256', 'total_tokens'
+
+        Returns a columnar (structure-of-arrays) result:
+            Dict with keys: 'text', 'texts' (chunk texts), 'chunk_indices'
+            (int32 ndarray), 'token_counts' (int32 ndarray), 'embeddings'
+            (float32 ndarray, shape (N, D)), 'sha256', 'total_tokens'
         """
         # Extract text
         text = self.extract_text(content, content_type, filename)
-        
-        # Compute hash
-        sha256 = self.compute_sha256(content)
+
+        # Compute hash (skipped when the caller already hashed the stream)
+        if sha256 is None:
+            sha256 = self.compute_sha256(content)
         
         # Chunk text
         chunks = self.chunker.chunk_text(text)
-        
+
         if not chunks:
             raise ValueError("Document produced no chunks")
-        
-        # Generate embeddings for each chunk
+
+        # Columnar layout: parallel arrays instead of a list of per-chunk
+        # dicts, so callers build payloads from aligned columns and numeric
+        # stats stay in numpy
         chunk_texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.embedding_model.encode(chunk_texts, show_progress_bar=False)
-        
-        # Convert numpy arrays to lists
-        embeddings = [emb.tolist() for emb in embeddings]
-        
-        # Calculate total tokens
-        total_tokens = sum(chunk["token_count"] for chunk in chunks)
-        
+        chunk_indices = np.fromiter(
+            (chunk["chunk_index"] for chunk in chunks), dtype=np.int32, count=len(chunks)
+        )
+        token_counts = np.fromiter(
+            (chunk["token_count"] for chunk in chunks), dtype=np.int32, count=len(chunks)
+        )
+
+        # Generate embeddings for each chunk as one contiguous float32 array;
+        # downstream consumers slice/serialize it without per-row boxing.
+        # Chunks are encoded in token-length order so each batch pads to
+        # similar sequence lengths (less wasted compute), then un-permuted
+        # back to document order.
+        order = np.argsort(token_counts, kind="stable")
+        embeddings = self.embedding_model.encode(
+            [chunk_texts[i] for i in order],
+            batch_size=settings.embedding_encode_batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order), dtype=order.dtype)
+        embeddings = np.ascontiguousarray(embeddings[inverse], dtype=np.float32)
+
         return {
             "text": text,
-            "chunks": chunks,
+            "texts": chunk_texts,
+            "chunk_indices": chunk_indices,
+            "token_counts": token_counts,
             "embeddings": embeddings,
             "sha256": sha256,
-            "total_tokens": total_tokens,
+            "total_tokens": int(token_counts.sum()),
             "metadata_json": metadata_json
         }
 
@@ -1,9 +1,12 @@
 """Main FastAPI application."""
+import time
+
 from fastapi import FastAPI, Request
-from app.api.routes import router as api_router
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from app.api.routes import router as api_router, warmup, shutdown as routes_shutdown
 from app.ui.routes import router as ui_router
 from app.db.database import init_db
-from app.vectorstore.qdrant_client import QdrantStore
 from app.config import settings
 from app.logging_config import setup_logging
 
@@ -17,28 +20,55 @@ app = FastAPI(title="Chunkenizer", description="RAG Ingestion & Retrieval System
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all incoming requests."""
-    import time
-    start_time = time.time()
-    
-    logger.info(f"→ {request.method} {request.url.path} - Client: {request.client.host if request.client else 'unknown'}")
-    
+    # perf_counter is monotonic (immune to NTP steps); %-style args defer
+    # formatting until a handler actually accepts the record
+    start_time = time.perf_counter()
+
+    logger.info("→ %s %s - Client: %s", request.method, request.url.path,
+                request.client.host if request.client else "unknown")
+
     try:
         response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(f"← {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
+        process_time = time.perf_counter() - start_time
+        logger.info("← %s %s - Status: %s - Time: %.3fs", request.method,
+                    request.url.path, response.status_code, process_time)
         return response
     except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(f"✗ {request.method} {request.url.path} - Error: {str(e)} - Time: {process_time:.3f}s", exc_info=True)
+        process_time = time.perf_counter() - start_time
+        logger.error("✗ %s %s - Error: %s - Time: %.3fs", request.method,
+                     request.url.path, e, process_time, exc_info=True)
         raise
 
-# Include routers
+# Reject oversize bodies before any of them is received. This must run as
+# middleware: by the time a route handler with File/Form parameters is
+# invoked, Starlette has already parsed (and spooled) the full multipart
+# body, so an in-handler check cannot fail fast.
+@app.middleware("http")
+async def enforce_body_size_limit(request: Request, call_next):
+    """Fail oversize or malformed Content-Length requests before reading the body."""
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            declared_size = int(content_length)
+        except ValueError:
+            return ORJSONResponse(
+                status_code=400,
+                content={"detail": "Invalid Content-Length header"}
+            )
+        if declared_size > settings.max_upload_bytes:
+            return ORJSONResponse(
+                status_code=413,
+                content={"detail": "File too large"}
+            )
+    return await call_next(request)
+
+# Compress large JSON responses (document listings, search hits)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Include routers; API routes are mounted once under /api
 app.include_router(api_router, prefix="/api", tags=["api"])
 app.include_router(ui_router, tags=["ui"])
 
-# Also include API routes without prefix for direct access
-app.include_router(api_router)
-
 
 @app.on_event("startup")
 async def startup_event():
@@ -53,18 +83,28 @@ async def startup_event():
         logger.error(f"✗ Failed to initialize database: {e}", exc_info=True)
         raise
     
-    # Initialize Qdrant collection
+    # Pre-warm the shared processor/vectorstore singletons so the first
+    # request doesn't pay model-load latency. Warmup is best-effort: if the
+    # model or Qdrant is unavailable at boot (transient outage, tests
+    # running without services), the app still starts and the lazy getters
+    # retry on first use.
     try:
-        vectorstore = QdrantStore()
+        warmup()
         logger.info(f"✓ Qdrant collection ready: {settings.qdrant_collection_name}")
     except Exception as e:
-        logger.error(f"✗ Failed to initialize Qdrant: {e}", exc_info=True)
-        raise
-    
+        logger.error(f"✗ Warmup failed, deferring init to first use: {e}", exc_info=True)
+
     logger.info(f"✓ Embedding model: {settings.embedding_model}")
     logger.info("Application startup complete")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain and close shared connections on shutdown."""
+    logger.info("Shutting down Chunkenizer application...")
+    routes_shutdown()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
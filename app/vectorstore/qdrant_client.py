@@ -1,7 +1,19 @@
 """Qdrant vector store client."""
+import contextlib
+import hashlib
+import os
+import threading
+import uuid
+import numpy as np
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.models import (
+    Batch, Datatype, Distance, VectorParams, Filter, FieldCondition, MatchValue,
+    MatchAny, FilterSelector, PayloadSchemaType, QueryRequest,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    OptimizersConfigDiff
+)
 from app.config import settings
 
 
@@ -9,65 +21,157 @@ class QdrantStore:
     """Qdrant vector store wrapper."""
     
     def __init__(self):
+        # One client per process: the underlying HTTP/gRPC channel is reused
+        # across calls, so requests skip connection setup. gRPC keepalive
+        # stops idle channels from being torn down between requests.
         self.client = QdrantClient(
             host=settings.qdrant_host,
             port=settings.qdrant_port,
+            grpc_port=settings.qdrant_grpc_port,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_options={
+                "grpc.keepalive_time_ms": 30000,
+                "grpc.keepalive_timeout_ms": 10000,
+            },
         )
         self.collection_name = settings.qdrant_collection_name
+        # Bounded LRU of search results. Repeat queries are common (the
+        # query-embedding cache upstream makes their vectors byte-identical),
+        # so hits skip the Qdrant round trip entirely. Any write bumps the
+        # epoch, which invalidates every cached entry at once.
+        self._search_cache = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        self._cache_epoch = 0
         self._ensure_collection()
+
+    _SEARCH_CACHE_SIZE = 1024
+
+    def _bump_cache_epoch(self):
+        """Invalidate cached search results after any write to the collection."""
+        with self._search_cache_lock:
+            self._cache_epoch += 1
+
+    def close(self):
+        """Close the underlying client connection."""
+        try:
+            self.client.close()
+        except Exception:
+            pass
     
+    def _create_collection(self, vector_size: int):
+        """Create the collection, with int8 quantization when configured."""
+        quantization_config = None
+        if settings.qdrant_quantization:
+            # Quantized vectors stay in RAM at a quarter of the float32
+            # footprint; originals remain on disk for rescoring
+            quantization_config = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                distance=Distance.COSINE,
+                # Half-precision server-side storage when configured: the
+                # wire format is float32 either way, so this is where the
+                # dtype actually takes effect
+                datatype=(
+                    Datatype.FLOAT16
+                    if settings.vector_dtype == "float16"
+                    else None
+                )
+            ),
+            quantization_config=quantization_config
+        )
+
     def _ensure_collection(self):
         """Ensure collection exists with correct vector size."""
         # Get vector size from embedding model (all-MiniLM-L6-v2 has 384 dimensions)
         vector_size = 384
-        
+
         try:
-            collections = self.client.get_collections()
-            collection_names = [col.name for col in collections.collections]
-            
-            if self.collection_name not in collection_names:
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=vector_size,
-                        distance=Distance.COSINE
-                    )
-                )
+            # Single existence probe instead of listing every collection
+            if not self.client.collection_exists(self.collection_name):
+                self._create_collection(vector_size)
+            self._ensure_payload_indexes()
         except Exception as e:
-            # Collection might already exist, try to recreate if needed
+            # The probe and create can race another process starting up, in
+            # which case the collection now exists and there is nothing to
+            # do. Recovery here must never delete: this runs on every
+            # process start, against a collection that may hold data.
+            import logging
+            logging.warning("Collection setup raced or failed: %s", e)
             try:
-                self.client.delete_collection(self.collection_name)
-                self.client.create_collection(
+                self._ensure_payload_indexes()
+            except Exception:
+                pass
+    
+    def _ensure_payload_indexes(self):
+        """Create keyword payload indexes so filtered deletes/searches are index scans."""
+        for field_name in ("doc_id", "sha256"):
+            try:
+                self.client.create_payload_index(
                     collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=vector_size,
-                        distance=Distance.COSINE
-                    )
+                    field_name=field_name,
+                    field_schema=PayloadSchemaType.KEYWORD
                 )
-            except:
+            except Exception:
+                # Index already exists (or server predates payload indexes)
                 pass
-    
+
     def add_vectors(
         self,
         vectors: List[List[float]],
         payloads: List[Dict[str, Any]],
-        ids: Optional[List[str]] = None
+        ids: Optional[List[str]] = None,
+        wait: bool = True
     ):
-        """Add vectors to the collection."""
+        """
+        Add vectors to the collection.
+
+        With wait=False the server acknowledges once the write is in its WAL
+        rather than after indexing, so callers streaming many batches can
+        pipeline them and pass wait=True only on the last one as a flush.
+        """
         if ids is None:
-            import uuid
-            ids = [str(uuid.uuid4()) for _ in vectors]
-        
-        points = [
-            PointStruct(id=id_, vector=vector, payload=payload)
-            for id_, vector, payload in zip(ids, vectors, payloads)
-        ]
-        
+            # One entropy read sliced per point instead of an os.urandom
+            # syscall inside every uuid4() call
+            rand = os.urandom(16 * len(vectors))
+            ids = [
+                str(uuid.UUID(bytes=rand[i * 16:(i + 1) * 16], version=4))
+                for i in range(len(vectors))
+            ]
+
+        # Accept a (N, D) numpy array and convert it in a single C-level
+        # tolist() call instead of boxing floats row by row in Python. No
+        # float16 cast here: the wire format is float32 regardless, and the
+        # storage dtype is set on the collection itself
+        if isinstance(vectors, np.ndarray):
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32).tolist()
+
+        # Columnar Batch: one message with parallel id/vector/payload lists
+        # instead of validating a PointStruct per point
         self.client.upsert(
             collection_name=self.collection_name,
-            points=points
+            points=Batch(ids=ids, vectors=vectors, payloads=payloads),
+            wait=wait
         )
+        self._bump_cache_epoch()
     
+    def _build_filter(self, filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """Build a Qdrant Filter from a flat key/value filter dict."""
+        if not filters:
+            return None
+        conditions = [
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in filters.items()
+        ]
+        return Filter(must=conditions) if conditions else None
+
     def search(
         self,
         query_vector: List[float],
@@ -75,25 +179,34 @@ class QdrantStore:
         filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Search for similar vectors."""
-        query_filter = None
-        
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                conditions.append(
-                    FieldCondition(key=key, match=MatchValue(value=value))
-                )
-            if conditions:
-                query_filter = Filter(must=conditions)
-        
-        results = self.client.search(
+        query_filter = self._build_filter(filters)
+
+        # Cache key: vector bytes + parameters, scoped to the current write
+        # epoch so stale results are never served after an upsert/delete
+        vector_np = np.asarray(query_vector, dtype=np.float32)
+        cache_key = (
+            self._cache_epoch,
+            hashlib.blake2b(vector_np.tobytes(), digest_size=16).digest(),
+            top_k,
+            tuple(sorted(filters.items())) if filters else None
+        )
+        with self._search_cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                self._search_cache.move_to_end(cache_key)
+                return cached
+
+        # Query vectors stay numpy all the way from the model (and the query
+        # cache); convert once here at the client boundary with a single
+        # C-level tolist() instead of per-call conversions upstream
+        results = self.client.query_points(
             collection_name=self.collection_name,
-            query_vector=query_vector,
+            query=vector_np.tolist(),
             limit=top_k,
             query_filter=query_filter
-        )
-        
-        return [
+        ).points
+
+        formatted = [
             {
                 "id": result.id,
                 "score": result.score,
@@ -101,7 +214,49 @@ class QdrantStore:
             }
             for result in results
         ]
+
+        with self._search_cache_lock:
+            self._search_cache[cache_key] = formatted
+            self._search_cache.move_to_end(cache_key)
+            while len(self._search_cache) > self._SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        return formatted
     
+    def search_batch(
+        self,
+        query_vectors,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for similar vectors for many queries in one round trip."""
+        query_filter = self._build_filter(filters)
+
+        requests = [
+            QueryRequest(
+                query=vector.tolist() if hasattr(vector, "tolist") else vector,
+                limit=top_k,
+                filter=query_filter,
+                with_payload=True
+            )
+            for vector in query_vectors
+        ]
+        batch_responses = self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=requests
+        )
+
+        return [
+            [
+                {
+                    "id": result.id,
+                    "score": result.score,
+                    "payload": result.payload
+                }
+                for result in response.points
+            ]
+            for response in batch_responses
+        ]
+
     def delete_points(self, point_ids: List[str]) -> bool:
         """Delete multiple points by their IDs."""
         if not point_ids:
@@ -112,159 +267,128 @@ class QdrantStore:
                 collection_name=self.collection_name,
                 points_selector=point_ids
             )
+            self._bump_cache_epoch()
             return True
         except Exception as e:
             raise Exception(f"Failed to delete points: {e}")
     
     def delete_all_points(self) -> int:
-        """Delete all points from the collection."""
+        """
+        Delete all points from the collection with one filtered call.
+
+        An empty Filter matches every point, so the server clears the
+        collection without the client ever scrolling IDs into memory. The
+        count is taken first only to report how many points were removed.
+        """
         try:
-            # First, get the total count
             try:
-                count_result = self.client.count(collection_name=self.collection_name)
-                total_count = count_result.count
-            except Exception as e:
+                total_count = self.client.count(collection_name=self.collection_name).count
+            except Exception:
                 # If count fails, we'll still try to delete
                 total_count = None
-            
-            # If count is 0, nothing to delete
+
+            # Only skip the delete when the count actually came back empty
             if total_count == 0:
                 return 0
-            
-            # Try method 1: Scroll and delete by IDs
-            all_point_ids = []
-            offset = None
-            batch_size = 10000
-            
+
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=Filter(must=[]))
+            )
+            self._bump_cache_epoch()
+            return total_count if total_count is not None else 0
+        except Exception as delete_error:
+            # Fallback: recreate the collection (loses nothing once all
+            # points are gone anyway; indexes are rebuilt on creation)
+            import logging
+            logging.warning(
+                "Filtered delete-all failed: %s. Recreating collection.", delete_error
+            )
             try:
-                while True:
-                    scroll_result = self.client.scroll(
-                        collection_name=self.collection_name,
-                        limit=batch_size,
-                        offset=offset,
-                        with_payload=False,
-                        with_vectors=False
-                    )
-                    
-                    points = scroll_result[0]
-                    if not points:
-                        break
-                    
-                    batch_ids = [point.id for point in points]
-                    all_point_ids.extend(batch_ids)
-                    
-                    # Get next offset (point ID for next page)
-                    if len(scroll_result) > 1:
-                        offset = scroll_result[1]
-                    else:
-                        offset = None
-                    
-                    # If we got fewer points than the limit, we've reached the end
-                    if len(points) < batch_size or offset is None:
-                        break
-                
-                # Delete all points in batches if there are many
-                if all_point_ids:
-                    # Qdrant can handle large deletions, but let's do it in batches to be safe
-                    delete_batch_size = 10000
-                    for i in range(0, len(all_point_ids), delete_batch_size):
-                        batch = all_point_ids[i:i + delete_batch_size]
-                        self.client.delete(
-                            collection_name=self.collection_name,
-                            points_selector=batch
-                        )
-                    
-                    return len(all_point_ids)
-            except Exception as scroll_error:
-                # If scroll method fails, try alternative: delete and recreate collection
-                import logging
-                logging.warning(f"Scroll-based deletion failed: {scroll_error}. Trying collection recreation method.")
-                
-                # Method 2: Delete and recreate collection (more reliable but loses collection settings)
-                try:
-                    # Get collection config first
-                    collections = self.client.get_collections()
-                    collection_exists = any(col.name == self.collection_name for col in collections.collections)
-                    
-                    if collection_exists:
-                        # Get vector size from existing collection or use default
-                        vector_size = 384  # Default for all-MiniLM-L6-v2
-                        try:
-                            # Try to get config via HTTP
-                            import requests
-                            response = requests.get(
-                                f"http://{settings.qdrant_host}:{settings.qdrant_port}/collections/{self.collection_name}",
-                                timeout=5
-                            )
-                            if response.status_code == 200:
-                                data = response.json().get('result', {})
-                                if 'config' in data:
-                                    params = data['config'].get('params', {})
-                                    vectors_config = params.get('vectors', {})
-                                    if isinstance(vectors_config, dict):
-                                        vector_size = vectors_config.get('size', 384)
-                        except:
-                            pass
-                        
-                        # Delete and recreate collection
-                        self.client.delete_collection(self.collection_name)
-                        self.client.create_collection(
-                            collection_name=self.collection_name,
-                            vectors_config=VectorParams(
-                                size=vector_size,
-                                distance=Distance.COSINE
-                            )
-                        )
-                        return total_count if total_count else 0
-                except Exception as recreate_error:
-                    raise Exception(f"Both deletion methods failed. Scroll error: {scroll_error}, Recreate error: {recreate_error}")
-            
-            # If we found no points but count says there are points, collection might be in inconsistent state
-            if total_count and total_count > 0 and len(all_point_ids) == 0:
-                import logging
-                logging.warning(f"Found {total_count} points in count but scroll returned 0 points. Collection may be in inconsistent state.")
-                # Try to recreate collection as last resort
-                try:
-                    self.client.delete_collection(self.collection_name)
-                    self.client.create_collection(
-                        collection_name=self.collection_name,
-                        vectors_config=VectorParams(
-                            size=384,
-                            distance=Distance.COSINE
-                        )
-                    )
-                    return total_count
-                except:
-                    return 0
-            
-            return 0
-        except Exception as e:
-            raise Exception(f"Failed to delete all points: {e}")
+                self.client.delete_collection(self.collection_name)
+                self._create_collection(384)
+                self._ensure_payload_indexes()
+                return total_count if total_count is not None else 0
+            except Exception as recreate_error:
+                raise Exception(
+                    f"Both deletion methods failed. Delete error: {delete_error}, "
+                    f"Recreate error: {recreate_error}"
+                )
     
     def delete_by_doc_id(self, doc_id: str):
-        """Delete all vectors for a document."""
-        from qdrant_client.models import ScrollRequest
-        # Scroll to find all points with matching doc_id
-        scroll_result = self.client.scroll(
+        """Delete all vectors for a document in a single filtered call."""
+        self.client.delete(
             collection_name=self.collection_name,
-            scroll_filter=Filter(
-                must=[
-                    FieldCondition(key="doc_id", match=MatchValue(value=doc_id))
-                ]
-            ),
-            limit=10000  # Adjust if needed
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[
+                        FieldCondition(key="doc_id", match=MatchValue(value=doc_id))
+                    ]
+                )
+            )
         )
-        
-        # Extract point IDs
-        point_ids = [point.id for point in scroll_result[0]]
-        
-        # Delete points by IDs
-        if point_ids:
-            self.client.delete(
+        self._bump_cache_epoch()
+    
+    def delete_by_doc_ids(self, doc_ids: List[str]):
+        """Delete all vectors for many documents in a single filtered call."""
+        if not doc_ids:
+            return
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[
+                        FieldCondition(key="doc_id", match=MatchAny(any=doc_ids))
+                    ]
+                )
+            )
+        )
+        self._bump_cache_epoch()
+
+    @contextlib.contextmanager
+    def bulk_load(self, indexing_threshold: int = 20000):
+        """
+        Pause HNSW indexing for the duration of a bulk load.
+
+        Setting indexing_threshold=0 stops the optimizer from building
+        index segments mid-load (each build stalls concurrent upserts);
+        the exit path restores the threshold so the server indexes the
+        new points in one pass. Intended for corpus (re)loads, not the
+        per-upload request path, where searches run concurrently.
+        """
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            optimizer_config=OptimizersConfigDiff(indexing_threshold=0)
+        )
+        try:
+            yield self
+        finally:
+            self.client.update_collection(
                 collection_name=self.collection_name,
-                points_selector=point_ids
+                optimizer_config=OptimizersConfigDiff(
+                    indexing_threshold=indexing_threshold
+                )
             )
-    
+
+    def enable_quantization(self):
+        """
+        Enable int8 scalar quantization on the collection.
+
+        Quantized vectors are kept in RAM (always_ram), so searches scan a
+        4x smaller representation and only rescore the top candidates
+        against the original float32 vectors. Existing points are
+        re-quantized by the server in the background.
+        """
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    always_ram=True
+                )
+            )
+        )
+
     def health_check(self) -> bool:
         """Check if Qdrant is healthy."""
         try:
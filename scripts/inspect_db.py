@@ -24,27 +24,33 @@ def format_datetime(dt_str):
 
 
 def print_table(conn, table_name):
-    """Print all rows from a table."""
+    """Print all rows from a table, streaming one row at a time."""
     cursor = conn.cursor()
-    cursor.execute(f"SELECT * FROM {table_name}")
-    rows = cursor.fetchall()
-    columns = [description[0] for description in cursor.description]
-    
-    if not rows:
+
+    # Cheap count for the header; the rows themselves are streamed off the
+    # cursor instead of fetchall()'d, so memory stays flat on big tables
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    row_count = cursor.fetchone()[0]
+
+    if not row_count:
         print(f"\n{table_name}: No rows found")
         return
-    
+
+    cursor.arraysize = 1000
+    cursor.execute(f"SELECT * FROM {table_name}")
+    columns = [description[0] for description in cursor.description]
+
     print(f"\n{'='*80}")
-    print(f"Table: {table_name} ({len(rows)} rows)")
+    print(f"Table: {table_name} ({row_count} rows)")
     print('='*80)
-    
+
     # Print column headers
     header = " | ".join(f"{col:20}" for col in columns)
     print(header)
     print("-" * len(header))
-    
+
     # Print rows
-    for row in rows:
+    for row in cursor:
         formatted_row = []
         for i, val in enumerate(row):
             if columns[i] in ['created_at', 'updated_at']:
@@ -63,22 +69,14 @@ def print_table(conn, table_name):
 def show_statistics(conn):
     """Show database statistics."""
     cursor = conn.cursor()
-    
-    # Count documents
-    cursor.execute("SELECT COUNT(*) FROM documents")
-    doc_count = cursor.fetchone()[0]
-    
-    # Total chunks
-    cursor.execute("SELECT SUM(chunk_count) FROM documents")
-    total_chunks = cursor.fetchone()[0] or 0
-    
-    # Total tokens
-    cursor.execute("SELECT SUM(total_tokens) FROM documents")
-    total_tokens = cursor.fetchone()[0] or 0
-    
-    # Average chunks per document
-    cursor.execute("SELECT AVG(chunk_count) FROM documents")
-    avg_chunks = cursor.fetchone()[0] or 0
+
+    # All four aggregates in one scan instead of four
+    cursor.execute(
+        "SELECT COUNT(*), COALESCE(SUM(chunk_count), 0), "
+        "COALESCE(SUM(total_tokens), 0), COALESCE(AVG(chunk_count), 0) "
+        "FROM documents"
+    )
+    doc_count, total_chunks, total_tokens, avg_chunks = cursor.fetchone()
     
     print("\n" + "="*80)
     print("DATABASE STATISTICS")
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 """Script to inspect the Qdrant vector database."""
 import sys
-import requests
 from pathlib import Path
 
 # Add parent directory to path to import app modules
@@ -31,24 +30,12 @@ def show_collection_info(store):
             except Exception as e:
                 print(f"  Points count: (could not retrieve)")
             
-            # Try to get collection info using HTTP API directly to avoid Pydantic issues
+            # Read config over the already-open client connection
             try:
-                host = settings.qdrant_host
-                port = settings.qdrant_port
-                response = requests.get(f"http://{host}:{port}/collections/{name}", timeout=5)
-                if response.status_code == 200:
-                    data = response.json().get('result', {})
-                    if 'config' in data:
-                        params = data['config'].get('params', {})
-                        vectors_config = params.get('vectors', {})
-                        if isinstance(vectors_config, dict):
-                            if 'size' in vectors_config:
-                                print(f"  Vector size: {vectors_config['size']}")
-                            if 'distance' in vectors_config:
-                                print(f"  Distance: {vectors_config['distance']}")
-                        elif hasattr(vectors_config, 'size'):
-                            print(f"  Vector size: {vectors_config.size}")
-                            print(f"  Distance: {vectors_config.distance}")
+                info = store.client.get_collection(name)
+                vectors_config = info.config.params.vectors
+                print(f"  Vector size: {vectors_config.size}")
+                print(f"  Distance: {vectors_config.distance}")
             except Exception as e:
                 # Fallback to default values
                 print(f"  Vector size: 384 (default for all-MiniLM-L6-v2)")
@@ -65,17 +52,18 @@ def show_collection_info(store):
 def show_sample_points(store, collection_name, limit=5):
     """Show sample points from the collection."""
     try:
-        from qdrant_client.models import ScrollRequest
-        
         print("\n" + "="*80)
         print(f"SAMPLE POINTS (first {limit})")
         print("="*80)
-        
-        # Scroll to get points
+
+        # Scroll to get points, projecting only the displayed payload
+        # fields server-side so full chunk text isn't shipped for points
+        # we truncate to 100 chars anyway
         scroll_result = store.client.scroll(
             collection_name=collection_name,
             limit=limit,
-            with_payload=True,
+            with_payload=["doc_id", "name", "chunk_index", "token_count",
+                          "chunk_text", "created_at"],
             with_vectors=False  # Don't print full vectors (too large)
         )
         
@@ -126,7 +114,7 @@ def show_document_vectors(store, doc_id):
                 ]
             ),
             limit=1000,
-            with_payload=True,
+            with_payload=["chunk_index", "token_count", "chunk_text"],
             with_vectors=False
         )
         
@@ -166,20 +154,8 @@ def show_statistics(store, db_session):
                 if hasattr(info.config.params, 'vectors'):
                     vector_size = info.config.params.vectors.size
                     distance = str(info.config.params.vectors.distance)
-        except Exception:
-            # Fallback: use raw API
-            try:
-                import requests
-                response = requests.get(f"http://{store.client._host}:{store.client._port}/collections/{store.collection_name}")
-                if response.status_code == 200:
-                    data = response.json()['result']
-                    total_points = data.get('points_count', 0)
-                    vectors_config = data.get('config', {}).get('params', {}).get('vectors', {})
-                    if isinstance(vectors_config, dict):
-                        vector_size = vectors_config.get('size', 384)
-                        distance = vectors_config.get('distance', 'Cosine')
-            except Exception as e:
-                print(f"Warning: Could not get collection info: {e}")
+        except Exception as e:
+            print(f"Warning: Could not get collection info: {e}")
         
         # Get document count from SQLite
         documents = db_session.query(Document).all()
@@ -203,16 +179,27 @@ def show_statistics(store, db_session):
         traceback.print_exc()
 
 
+# Loaded once on first search; repeat searches skip the model load
+_processor = None
+
+
+def _get_processor():
+    """Lazily build and reuse the embedding processor."""
+    global _processor
+    if _processor is None:
+        from app.ingest.processor import DocumentProcessor
+        _processor = DocumentProcessor()
+    return _processor
+
+
 def search_example(store, query_text="machine learning", top_k=3):
     """Perform an example search."""
     try:
-        from app.ingest.processor import DocumentProcessor
-        
         print("\n" + "="*80)
         print(f"EXAMPLE SEARCH: '{query_text}'")
         print("="*80)
-        
-        processor = DocumentProcessor()
+
+        processor = _get_processor()
         query_embedding = processor.embedding_model.encode(query_text, show_progress_bar=False).tolist()
         
         results = store.search(
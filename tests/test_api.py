@@ -1,15 +1,67 @@
 """Tests for API endpoints."""
+import hashlib
+
 import pytest
 from fastapi.testclient import TestClient
+from app.db.database import SessionLocal
+from app.db.models import Document
 from app.main import app
 
-client = TestClient(app)
+
+@pytest.fixture(scope="session")
+def client():
+    """Shared test client; runs app startup/shutdown once per session."""
+    with TestClient(app) as c:
+        yield c
+
+
+def _insert_document(content: bytes, status: str):
+    """Insert a document row directly, returning its id."""
+    db = SessionLocal()
+    doc = Document(
+        name="existing.txt",
+        content_type="text/plain",
+        sha256=hashlib.sha256(content).hexdigest(),
+        chunk_count=1,
+        total_tokens=4,
+        status=status
+    )
+    db.add(doc)
+    db.commit()
+    doc_id = doc.id
+    db.close()
+    return doc_id
+
+
+def _delete_document(doc_id: str):
+    db = SessionLocal()
+    db.query(Document).filter(Document.id == doc_id).delete()
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def existing_document():
+    """An indexed document row, yielding (doc_id, content bytes)."""
+    content = b"already ingested content"
+    doc_id = _insert_document(content, status="indexed")
+    yield doc_id, content
+    _delete_document(doc_id)
 
 
-def test_health_endpoint():
+@pytest.fixture
+def failed_document():
+    """A document row whose background indexing failed."""
+    content = b"content that failed to index"
+    doc_id = _insert_document(content, status="failed")
+    yield doc_id, content
+    _delete_document(doc_id)
+
+
+def test_health_endpoint(client):
     """Test health check endpoint."""
     response = client.get("/api/health")
-    
+
     assert response.status_code == 200
     data = response.json()
     assert "status" in data
@@ -18,13 +70,73 @@ def test_health_endpoint():
     assert "embedding_model" in data
 
 
-def test_list_documents_empty():
+def test_list_documents_empty(client):
     """Test listing documents when none exist."""
     response = client.get("/api/documents")
-    
+
     assert response.status_code == 200
     data = response.json()
     assert "documents" in data
     assert "total" in data
     assert isinstance(data["documents"], list)
 
+
+def test_upload_header_dedup(client, existing_document):
+    """A pre-declared matching hash short-circuits before processing."""
+    doc_id, content = existing_document
+
+    response = client.post(
+        "/api/documents",
+        files={"file": ("existing.txt", content, "text/plain")},
+        headers={"X-Content-SHA256": hashlib.sha256(content).hexdigest()}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["message"] == "Document already exists"
+    assert data["document_id"] == doc_id
+    assert data["status"] == "indexed"
+
+
+def test_upload_computed_dedup(client, existing_document):
+    """Re-uploading known content dedups on the streamed hash."""
+    doc_id, content = existing_document
+
+    response = client.post(
+        "/api/documents",
+        files={"file": ("copy.txt", content, "text/plain")}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["message"] == "Document already exists"
+    assert data["document_id"] == doc_id
+    assert data["status"] == "indexed"
+
+
+def test_upload_failed_document_retries(client, failed_document):
+    """A failed document must not dedup-short-circuit; retries re-ingest."""
+    doc_id, content = failed_document
+
+    response = client.post(
+        "/api/documents",
+        files={"file": ("retry.txt", content, "text/plain")},
+        headers={"X-Content-SHA256": hashlib.sha256(content).hexdigest()}
+    )
+
+    # The upload proceeds to re-ingestion over the same row (which may
+    # still fail downstream, e.g. without a model or Qdrant in CI) rather
+    # than returning the dead-end duplicate response
+    assert response.json().get("message") != "Document already exists"
+
+
+def test_upload_sha_mismatch(client):
+    """A declared hash that doesn't match the body is a hard 400."""
+    response = client.post(
+        "/api/documents",
+        files={"file": ("mismatch.txt", b"actual content", "text/plain")},
+        headers={"X-Content-SHA256": hashlib.sha256(b"other content").hexdigest()}
+    )
+
+    assert response.status_code == 400
+    assert "X-Content-SHA256" in response.json()["detail"]
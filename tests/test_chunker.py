@@ -49,6 +49,28 @@ def test_chunker_empty():
     assert len(chunks) == 0
 
 
+def test_chunker_boundaries_match_token_windows():
+    """Chunk texts and counts must equal the fixed-stride token windows."""
+    chunker = TokenChunker()
+
+    text = " ".join(f"word{i}" for i in range(3000))
+    chunks = chunker.chunk_text(text)
+    tokens = chunker.encoding.encode_ordinary(text)
+    stride = chunker.chunk_size - chunker.chunk_overlap
+
+    assert len(chunks) > 1
+    for i, chunk in enumerate(chunks):
+        start = i * stride
+        end = min(start + chunker.chunk_size, len(tokens))
+        assert chunk["chunk_index"] == i
+        assert chunk["token_count"] == end - start
+        assert chunk["text"] == chunker.encoding.decode(tokens[start:end])
+
+    # The last window reaches the end of the document, and no chunk past it
+    last_start = (len(chunks) - 1) * stride
+    assert last_start + chunker.chunk_size >= len(tokens)
+
+
 def test_count_tokens():
     """Test token counting."""
     chunker = TokenChunker()
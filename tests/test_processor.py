@@ -24,6 +24,21 @@ def test_json_flatten():
     assert "nested.key: value" in flattened or "nested" in flattened
 
 
+def test_json_flatten_ordering():
+    """Flattened lines come out in document order with full keypaths."""
+    processor = DocumentProcessor()
+
+    json_obj = {
+        "a": 1,
+        "b": {"c": [10, {"d": 20}]},
+        "e": "x"
+    }
+
+    flattened = processor._flatten_json(json_obj)
+
+    assert flattened == "a: 1\nb.c[0]: 10\nb.c[1].d: 20\ne: x"
+
+
 def test_extract_text_plain():
     """Test plain text extraction."""
     processor = DocumentProcessor()